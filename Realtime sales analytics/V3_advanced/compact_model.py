@@ -0,0 +1,263 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+# -----------------------------
+# Compact forest format
+# A fitted one-hot + RandomForestRegressor Pipeline is flattened into plain
+# numpy arrays stored in a single .npz (loaded with allow_pickle=False):
+#   roots      int64   first node of every tree in the flat node arrays
+#   leaf_start int64   first leaf of every tree in `leaf_value`
+#   left       int32   left child relative to its tree's root, or -(leaf_id + 1) for a leaf
+#                      (leaf_id relative to its tree's leaf_start)
+#   right      int32   right child relative to its tree's root (unused for leaves)
+#   feature    uint8/uint16   index into `features` (used feature ids, deduplicated across trees)
+#   threshold  float32 split values rounded *down* to float32
+#   leaf_value float32 if every leaf value round-trips exactly, else float64
+#
+# sklearn trees compare float32 inputs against float64 thresholds; for any
+# float32 x, x <= t holds exactly when x <= (largest float32 <= t), so the
+# rounded-down thresholds make the same decisions as the originals.
+# -----------------------------
+ARRAYS = ["roots", "leaf_start", "left", "right", "feature", "features", "threshold", "leaf_value"]
+INT32_MAX = np.iinfo(np.int32).max
+
+
+def smallest_uint(max_value):
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if max_value <= np.iinfo(dtype).max:
+            return dtype
+    return np.uint64
+
+
+def float32_floor(values):
+    rounded = values.astype(np.float32)
+    too_high = rounded.astype(np.float64) > values
+    rounded[too_high] = np.nextafter(rounded[too_high], np.float32(-np.inf))
+    return rounded
+
+
+class CompactForest:
+    def __init__(self, meta, arrays):
+        self.meta = meta
+        self.arrays = arrays
+        self.categories = [np.asarray(c) for c in meta["categories"]]
+        # Original feature id of every node, resolved once instead of per batch
+        self.node_feature = arrays["features"][arrays["feature"]]
+
+    @classmethod
+    def from_pipeline(cls, pipeline):
+        from sklearn.ensemble import RandomForestRegressor
+        from sklearn.preprocessing import OneHotEncoder
+
+        prep = pipeline.named_steps["prep"]
+        forest = pipeline.named_steps["model"]
+        encoder = prep.named_transformers_["cat"]
+        if not isinstance(forest, RandomForestRegressor) or not isinstance(encoder, OneHotEncoder):
+            raise ValueError("Compact format supports the one-hot RandomForestRegressor backend only")
+
+        cat_cols, num_cols = [], []
+        for name, _, columns in prep.transformers_:
+            if name == "cat":
+                cat_cols = list(columns)
+            elif name == "num":
+                num_cols = list(columns)
+
+        roots, leaf_start, left, right, feature, threshold, leaf_value = [], [], [], [], [], [], []
+        node_offset = leaf_offset = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            if tree.node_count > INT32_MAX:
+                raise ValueError(f"Tree with {tree.node_count} nodes does not fit int32 child indices")
+            is_leaf = tree.children_left == -1
+            leaf_ids = np.cumsum(is_leaf) - 1
+
+            # Indices stay relative to the tree, so they fit int32 however large the forest is
+            roots.append(node_offset)
+            leaf_start.append(leaf_offset)
+            left.append(np.where(is_leaf, -(leaf_ids + 1), tree.children_left))
+            right.append(np.where(is_leaf, -1, tree.children_right))
+            feature.append(np.where(is_leaf, 0, tree.feature))
+            threshold.append(np.where(is_leaf, 0.0, tree.threshold))
+            leaf_value.append(tree.value[is_leaf, 0, 0])
+
+            node_offset += tree.node_count
+            leaf_offset += int(is_leaf.sum())
+
+        feature = np.concatenate(feature)
+        features, feature_idx = np.unique(feature, return_inverse=True)
+        leaf_value = np.concatenate(leaf_value)
+        leaf_value32 = leaf_value.astype(np.float32)
+        if np.array_equal(leaf_value32.astype(np.float64), leaf_value):
+            leaf_value = leaf_value32
+
+        arrays = {
+            "roots": np.asarray(roots, dtype=np.int64),
+            "leaf_start": np.asarray(leaf_start, dtype=np.int64),
+            "left": np.concatenate(left).astype(np.int32),
+            "right": np.concatenate(right).astype(np.int32),
+            "feature": feature_idx.astype(smallest_uint(len(features) - 1)),
+            "features": features.astype(np.int32),
+            "threshold": float32_floor(np.concatenate(threshold)),
+            "leaf_value": leaf_value,
+        }
+        meta = {
+            "cat_cols": cat_cols,
+            "num_cols": num_cols,
+            "categories": [c.tolist() for c in encoder.categories_],
+            "n_features": int(forest.n_features_in_),
+        }
+        return cls(meta, arrays)
+
+    # -----------------------------
+    # Serialization
+    # -----------------------------
+    def to_arrays(self, prefix=""):
+        out = {f"{prefix}{name}": self.arrays[name] for name in ARRAYS}
+        out[f"{prefix}meta"] = np.array(json.dumps(self.meta))
+        return out
+
+    @classmethod
+    def from_arrays(cls, data, prefix=""):
+        meta = json.loads(str(data[f"{prefix}meta"]))
+        return cls(meta, {name: data[f"{prefix}{name}"] for name in ARRAYS})
+
+    # -----------------------------
+    # Prediction
+    # -----------------------------
+    def transform(self, df):
+        # Same columns as the ColumnTransformer: one-hot blocks, then passthrough numbers.
+        # Unknown categories leave their block all zeros (handle_unknown="ignore").
+        X = np.zeros((len(df), self.meta["n_features"]), dtype=np.float32)
+        rows = np.arange(len(df))
+        offset = 0
+        for col, cats in zip(self.meta["cat_cols"], self.categories):
+            codes = pd.Categorical(df[col], categories=cats).codes
+            known = codes >= 0
+            X[rows[known], offset + codes[known]] = 1
+            offset += len(cats)
+        for j, col in enumerate(self.meta["num_cols"]):
+            X[:, offset + j] = df[col].to_numpy(np.float64)
+        return X
+
+    def predict(self, df, batch_size=10_000):
+        X = self.transform(df)
+        return np.concatenate([
+            self._predict_matrix(X[start:start + batch_size])
+            for start in range(0, max(len(X), 1), batch_size)
+        ])[:len(X)]
+
+    def _predict_matrix(self, X):
+        a = self.arrays
+        roots = a["roots"]
+        n_rows, n_trees = len(X), len(roots)
+        X_flat = X.ravel()
+
+        # Walk all (row, tree) pairs one level per iteration, dropping pairs as soon
+        # as they reach a leaf so deep trees do not keep finished pairs in the loop.
+        # Pairs are row-major: pair = row * n_trees + tree.
+        pair = np.arange(n_rows * n_trees)
+        base = np.tile(roots, n_rows)                       # flat position of each pair's tree root
+        x_offset = np.repeat(np.arange(n_rows) * X.shape[1], n_trees)
+        node = base.copy()
+        leaf_node = np.empty(n_rows * n_trees, dtype=np.int64)
+
+        while pair.size:
+            left = a["left"][node]
+            at_leaf = left < 0
+            if at_leaf.any():
+                leaf_node[pair[at_leaf]] = node[at_leaf]
+                keep = ~at_leaf
+                pair, base, x_offset, node, left = pair[keep], base[keep], x_offset[keep], node[keep], left[keep]
+                if not pair.size:
+                    break
+            go_left = X_flat[x_offset + self.node_feature[node]] <= a["threshold"][node]
+            node = np.where(go_left, left, a["right"][node]) + base
+
+        leaf_node = leaf_node.reshape(n_rows, n_trees)
+        leaf = a["leaf_value"][a["leaf_start"] - a["left"][leaf_node] - 1].astype(np.float64)
+
+        # Accumulate tree by tree, in the same order as RandomForestRegressor.predict
+        out = np.zeros(n_rows, dtype=np.float64)
+        for t in range(n_trees):
+            out += leaf[:, t]
+        return out / n_trees
+
+
+# -----------------------------
+# Bundles: profit_model + sales_model in one .npz
+# -----------------------------
+MODEL_NAMES = ["profit_model", "sales_model"]
+
+
+def save_bundle(bundle, path):
+    arrays = {}
+    for name in MODEL_NAMES:
+        model = bundle[name]
+        if not isinstance(model, CompactForest):
+            model = CompactForest.from_pipeline(model)
+        arrays.update(model.to_arrays(prefix=f"{name}."))
+    info = {k: v for k, v in bundle.items() if k not in MODEL_NAMES}
+    arrays["bundle_info"] = np.array(json.dumps(info))
+    np.savez(path, **arrays)
+
+
+def load_bundle(path):
+    with np.load(path, allow_pickle=False) as data:
+        bundle = json.loads(str(data["bundle_info"]))
+        for name in MODEL_NAMES:
+            bundle[name] = CompactForest.from_arrays(data, prefix=f"{name}.")
+    return bundle
+
+
+def main():
+    import joblib
+
+    from discount_api import DATA_PATH, FEATURES
+
+    parser = argparse.ArgumentParser(description="Convert a joblib model bundle to the compact .npz format")
+    parser.add_argument("source", help="joblib bundle written by discount_api.py")
+    parser.add_argument("target", help="output .npz path")
+    parser.add_argument("--data", default=DATA_PATH, help="rows used to verify identical predictions")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    bundle = joblib.load(args.source)
+    joblib_load_s = time.perf_counter() - started
+
+    save_bundle(bundle, args.target)
+
+    started = time.perf_counter()
+    compact = load_bundle(args.target)
+    compact_load_s = time.perf_counter() - started
+
+    X = pd.read_csv(args.data)[FEATURES]
+    batch_s = {"sklearn": 0.0, "compact": 0.0}
+    for name in MODEL_NAMES:
+        started = time.perf_counter()
+        expected = bundle[name].predict(X)
+        batch_s["sklearn"] += time.perf_counter() - started
+
+        started = time.perf_counter()
+        actual = compact[name].predict(X)
+        batch_s["compact"] += time.perf_counter() - started
+
+        if not np.array_equal(expected, actual):
+            raise SystemExit(f"❌ {name}: max difference {np.abs(expected - actual).max()}")
+
+    source_mb = os.path.getsize(args.source) / 1e6
+    target_mb = os.path.getsize(args.target) / 1e6
+    print(f"✅ Predictions identical on {len(X):,} rows")
+    print(f"📦 Size: {source_mb:.1f} MB → {target_mb:.1f} MB ({source_mb / target_mb:.1f}x smaller)")
+    print(f"⏱️ Load: {joblib_load_s:.2f}s → {compact_load_s:.2f}s")
+    print(f"⏱️ Batch predict ({len(X):,} rows, both models): {batch_s['sklearn']:.2f}s → {batch_s['compact']:.2f}s")
+    if batch_s["compact"] > batch_s["sklearn"]:
+        print("⚠️ Compact batch prediction is slower than the sklearn Pipeline on this machine")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import argparse
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import mean_absolute_error
+from sklearn.model_selection import train_test_split
+
+from discount_api import BACKENDS, DATA_PATH, FEATURES, build_models
+
+# -----------------------------
+# Side-by-side backend report:
+# fit time, inference latency, model size and holdout error
+# -----------------------------
+TARGETS = {"profit_model": "profit", "sales_model": "units_sold"}
+
+
+def single_row_latency_ms(model, X, n_calls=200):
+    rows = [X.iloc[[i % len(X)]] for i in range(n_calls)]
+    timings = []
+    for row in rows:
+        started = time.perf_counter()
+        model.predict(row)
+        timings.append((time.perf_counter() - started) * 1000)
+    return float(np.percentile(timings, 50)), float(np.percentile(timings, 95))
+
+
+def benchmark_backend(backend, X_train, X_test, y_train, y_test):
+    models = dict(zip(TARGETS, build_models(backend)))
+    report = {"backend": backend}
+
+    started = time.perf_counter()
+    for name, target in TARGETS.items():
+        models[name].fit(X_train, y_train[target])
+    report["fit_s"] = round(time.perf_counter() - started, 3)
+
+    started = time.perf_counter()
+    for name in TARGETS:
+        models[name].predict(X_test)
+    batch_s = time.perf_counter() - started
+    report["batch_rows_per_s"] = round(len(X_test) / batch_s, 1)
+
+    p50, p95 = single_row_latency_ms(models["profit_model"], X_test)
+    report["predict_p50_ms"] = round(p50, 3)
+    report["predict_p95_ms"] = round(p95, 3)
+
+    report["size_mb"] = round(sum(len(pickle.dumps(m)) for m in models.values()) / 1e6, 2)
+
+    for name, target in TARGETS.items():
+        pred = models[name].predict(X_test)
+        report[f"{target}_mae"] = round(mean_absolute_error(y_test[target], pred), 3)
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare model backends side by side")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--backends", nargs="+", default=sorted(BACKENDS), choices=sorted(BACKENDS))
+    parser.add_argument("--test-size", type=float, default=0.2)
+    parser.add_argument("--out", help="optional CSV path for the report")
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.data)
+    X_train, X_test, y_train, y_test = train_test_split(
+        df[FEATURES], df[list(TARGETS.values())], test_size=args.test_size, random_state=42
+    )
+
+    rows = []
+    for backend in args.backends:
+        print(f"⏱️ Benchmarking {backend} ...")
+        rows.append(benchmark_backend(backend, X_train, X_test, y_train, y_test))
+
+    report = pd.DataFrame(rows).set_index("backend")
+    print(report.to_string())
+
+    if args.out:
+        report.to_csv(args.out)
+        print(f"💾 Report saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
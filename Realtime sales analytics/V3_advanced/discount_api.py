@@ -1,55 +1,395 @@
-from fastapi import FastAPI
-from pydantic import BaseModel
-import pandas as pd
+import csv
+import json
+import multiprocessing
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Optional
 
-from sklearn.compose import ColumnTransformer
-from sklearn.preprocessing import OneHotEncoder
-from sklearn.pipeline import Pipeline
-from sklearn.ensemble import RandomForestRegressor
+from fastapi import BackgroundTasks, FastAPI, HTTPException
+from pydantic import BaseModel, Field
 
 print("✅ discount_api.py loaded successfully")
 
 app = FastAPI(title="Discount Optimization API (V3)")
 
 # -----------------------------
-# Load dataset
+# Settings
 # -----------------------------
-df = pd.read_csv("sales_history.csv")
+DATA_PATH = os.environ.get("SALES_HISTORY_PATH", "sales_history.csv")
+# Optional model bundle: loaded if it exists, written after training otherwise.
+# A .npz path uses the compact format from compact_model.py, anything else joblib.
+MODEL_PATH = os.environ.get("MODEL_PATH", "")
+# Precomputed by elasticity.py
+ELASTICITY_PATH = os.environ.get("ELASTICITY_PATH", "elasticity_table.csv")
+
+# Category sharding
+# SHARD_BY_CATEGORY=1  → train one model pair per category in parallel, routed in-process
+# SHARD_CATEGORY=X     → this process serves (and trains on) category X only
+# SHARD_URLS=Electronics=http://host:8101,Appliances=http://host:8102
+#                      → router mode: /predict and /retrain are forwarded to the category's shard
+SHARD_BY_CATEGORY = os.environ.get("SHARD_BY_CATEGORY", "") == "1"
+SHARD_CATEGORY = os.environ.get("SHARD_CATEGORY", "")
+SHARD_URLS = dict(
+    item.split("=", 1) for item in os.environ.get("SHARD_URLS", "").split(",") if "=" in item
+)
+
+
+def env_number(name, cast):
+    value = os.environ.get(name, "")
+    return cast(value) if value else None
+
+
+# Training window (defaults for startup, each /retrain request can override them)
+# last_n_days             → only rows from the N days before the newest row (or as_of)
+# as_of                   → ignore rows after this timestamp
+# recency_half_life_days  → weight rows by 0.5 ** (age / half_life)
+# sample_size             → (recency-weighted) sample of this many rows
+TRAINING_DEFAULTS = {
+    "last_n_days": env_number("TRAIN_LAST_N_DAYS", int),
+    "as_of": os.environ.get("TRAIN_AS_OF") or None,
+    "recency_half_life_days": env_number("TRAIN_RECENCY_HALF_LIFE_DAYS", float),
+    "sample_size": env_number("TRAIN_SAMPLE_SIZE", int),
+}
 
 # Features + Targets
 FEATURES = ["product", "category", "region", "base_price", "discount_pct", "competitor_price"]
-X = df[FEATURES]
-
-y_profit = df["profit"]
-y_sales = df["units_sold"]
 
-# Preprocessing
 cat_cols = ["product", "category", "region"]
 num_cols = ["base_price", "discount_pct", "competitor_price"]
 
-preprocess = ColumnTransformer(
-    transformers=[
-        ("cat", OneHotEncoder(handle_unknown="ignore"), cat_cols),
-        ("num", "passthrough", num_cols),
-    ]
-)
+# Price alerts (shared with score_scenarios.py)
+ALERT_HIGHER = "⚠️ Our price is higher than competitor → possible demand drop"
+ALERT_CHEAPER = "✅ Our price is cheaper than competitor → competitive advantage"
+ALERT_EQUAL = "ℹ️ Our price equals competitor"
+
+# -----------------------------
+# Model state (filled in by the background loader)
+# -----------------------------
+state = {
+    "ready": False,
+    "error": None,
+    "backend": None,
+    "model_version": None,
+    "load_seconds": None,
+    "profit_model": None,
+    "sales_model": None,
+    "shards": None,
+    "training": None,
+    "last_retrain": None,
+}
+
+
+# -----------------------------
+# Model backends
+# -----------------------------
+# Every backend builds one unfitted sklearn Pipeline taking FEATURES as input.
+# sklearn is imported inside each builder so the server can bind before it is loaded.
+def random_forest_backend():
+    from sklearn.compose import ColumnTransformer
+    from sklearn.preprocessing import OneHotEncoder
+    from sklearn.pipeline import Pipeline
+    from sklearn.ensemble import RandomForestRegressor
+
+    preprocess = ColumnTransformer(
+        transformers=[
+            ("cat", OneHotEncoder(handle_unknown="ignore"), cat_cols),
+            ("num", "passthrough", num_cols),
+        ]
+    )
+
+    return Pipeline([
+        ("prep", preprocess),
+        ("model", RandomForestRegressor(n_estimators=200, random_state=42))
+    ])
+
+
+def hist_gradient_boosting_backend():
+    from sklearn.compose import ColumnTransformer
+    from sklearn.preprocessing import OrdinalEncoder
+    from sklearn.pipeline import Pipeline
+    from sklearn.ensemble import HistGradientBoostingRegressor
+
+    # Unknown categories become -1, which the booster treats as missing
+    preprocess = ColumnTransformer(
+        transformers=[
+            ("cat", OrdinalEncoder(handle_unknown="use_encoded_value", unknown_value=-1), cat_cols),
+            ("num", "passthrough", num_cols),
+        ]
+    )
+
+    # The ordinal-encoded columns come first, so they are the categorical ones
+    categorical_mask = [True] * len(cat_cols) + [False] * len(num_cols)
+
+    return Pipeline([
+        ("prep", preprocess),
+        ("model", HistGradientBoostingRegressor(
+            categorical_features=categorical_mask,
+            max_iter=300,
+            learning_rate=0.1,
+            random_state=42,
+        ))
+    ])
+
+
+BACKENDS = {
+    "random_forest": random_forest_backend,
+    "hist_gradient_boosting": hist_gradient_boosting_backend,
+}
+
+MODEL_BACKEND = os.environ.get("MODEL_BACKEND", "random_forest")
+
+
+def build_models(backend=MODEL_BACKEND):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown model backend {backend!r}, expected one of {sorted(BACKENDS)}")
+
+    profit_model = BACKENDS[backend]()
+    sales_model = BACKENDS[backend]()
+    return profit_model, sales_model
+
+
+# -----------------------------
+# Sales history (sorted by date, read once and then only appended rows)
+# -----------------------------
+history_cache = {"history": None}
+history_lock = threading.Lock()
+
+
+def sales_history():
+    from history_index import SalesHistory
 
-# Models
-profit_model = Pipeline([
-    ("prep", preprocess),
-    ("model", RandomForestRegressor(n_estimators=200, random_state=42))
-])
+    with history_lock:
+        if history_cache["history"] is None:
+            history_cache["history"] = SalesHistory.load(DATA_PATH)
+        else:
+            history_cache["history"].refresh()
+        return history_cache["history"]
 
-sales_model = Pipeline([
-    ("prep", preprocess),
-    ("model", RandomForestRegressor(n_estimators=200, random_state=42))
-])
 
-# Train once when API starts
-profit_model.fit(X, y_profit)
-sales_model.fit(X, y_sales)
+def training_options(options=None):
+    return {**TRAINING_DEFAULTS, **(options or {})}
+
+
+def read_history(category=None, options=None):
+    from history_index import training_frame
+
+    df = training_frame(sales_history(), category=category, **training_options(options))
+    if df.empty:
+        raise ValueError(f"No sales history for {category or 'all categories'} in this training window")
+    return df
+
+
+def fit_models(df, backend=MODEL_BACKEND):
+    X = df[FEATURES]
+
+    y_profit = df["profit"]
+    y_sales = df["units_sold"]
+
+    # Recency weights from the training window, if any
+    fit_params = {}
+    if "sample_weight" in df:
+        fit_params["model__sample_weight"] = df["sample_weight"].to_numpy()
+
+    profit_model, sales_model = build_models(backend)
+    profit_model.fit(X, y_profit, **fit_params)
+    sales_model.fit(X, y_sales, **fit_params)
+
+    return {"profit_model": profit_model, "sales_model": sales_model}
+
+
+def new_model_version(backend):
+    return time.strftime(f"v3-{backend}-%Y%m%dT%H%M%S")
+
+
+def train_models(backend=MODEL_BACKEND, category=SHARD_CATEGORY or None, options=None):
+    df = read_history(category, options)
+    bundle = fit_models(df, backend)
+    bundle["backend"] = backend
+    bundle["model_version"] = new_model_version(backend)
+    bundle["training"] = {**training_options(options), "rows": len(df)}
+    return bundle
+
+
+# -----------------------------
+# Category shards
+# -----------------------------
+class UnknownShardError(LookupError):
+    pass
+
+
+class ShardedModel:
+    # Routes every row to the model trained on its category
+    def __init__(self, shards, name):
+        self.shards = shards
+        self.name = name
+
+    def predict(self, X):
+        import numpy as np
+
+        out = np.empty(len(X), dtype=float)
+        categories = X["category"].to_numpy()
+        for category in set(categories):
+            if category not in self.shards:
+                raise UnknownShardError(f"No model shard for category {category!r}")
+            mask = categories == category
+            out[mask] = self.shards[category][self.name].predict(X[mask])
+        return out
+
+
+def sharded_bundle(shards, backend, training=None):
+    return {
+        "profit_model": ShardedModel(shards, "profit_model"),
+        "sales_model": ShardedModel(shards, "sales_model"),
+        "shards": shards,
+        "backend": backend,
+        "model_version": new_model_version(backend),
+        "training": training,
+    }
+
+
+def train_sharded_models(backend=MODEL_BACKEND, options=None, max_workers=None):
+    df = read_history(options=options)
+
+    # spawn: safe to start from the loader thread of a running server
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=ctx) as pool:
+        futures = {
+            category: pool.submit(fit_models, group, backend)
+            for category, group in df.groupby("category")
+        }
+        shards = {category: future.result() for category, future in futures.items()}
+
+    return sharded_bundle(shards, backend, {**training_options(options), "rows": len(df)})
+
+
+def load_bundle(path):
+    if path.endswith(".npz"):
+        import compact_model
+        return compact_model.load_bundle(path)
+
+    import joblib
+    return joblib.load(path)
+
+
+def save_bundle(bundle, path):
+    if path.endswith(".npz"):
+        if "shards" in bundle:
+            raise ValueError("Sharded bundles are saved with joblib, use a non-.npz MODEL_PATH")
+        import compact_model
+        compact_model.save_bundle(bundle, path)
+    else:
+        import joblib
+        joblib.dump(bundle, path)
+
+
+def check_model_path(path=MODEL_PATH, backend=MODEL_BACKEND, sharded=SHARD_BY_CATEGORY):
+    # The compact format only holds unsharded random forests; fail before training, not after
+    if path.endswith(".npz"):
+        if backend != "random_forest":
+            raise RuntimeError(f"Model path {path!r} (.npz) needs MODEL_BACKEND=random_forest, got {backend!r}")
+        if sharded:
+            raise RuntimeError(f"Model path {path!r} (.npz) cannot hold sharded models, use a joblib path")
+
+
+def check_training_defaults():
+    # Same rules as RetrainRequest, so a bad TRAIN_* value fails startup instead of training
+    for name in ["last_n_days", "recency_half_life_days", "sample_size"]:
+        value = TRAINING_DEFAULTS[name]
+        if value is not None and value <= 0:
+            raise RuntimeError(f"TRAIN_{name.upper()} must be > 0, got {value}")
+    if TRAINING_DEFAULTS["as_of"]:
+        datetime.fromisoformat(TRAINING_DEFAULTS["as_of"].replace("Z", "+00:00"))
+
+
+def save_bundle_or_warn(bundle):
+    # A failed save must not undo a load or retrain that already succeeded
+    try:
+        save_bundle(bundle, MODEL_PATH)
+    except Exception as exc:
+        print(f"⚠️ Could not save models to {MODEL_PATH}: {type(exc).__name__}: {exc}")
+        return
+    print(f"💾 Models saved to {MODEL_PATH}")
+
+
+def load_or_train():
+    if MODEL_PATH and os.path.exists(MODEL_PATH):
+        print(f"📦 Loading models from {MODEL_PATH}")
+        return load_bundle(MODEL_PATH)
+
+    bundle = train_sharded_models() if SHARD_BY_CATEGORY else train_models()
+    if MODEL_PATH:
+        save_bundle_or_warn(bundle)
+    return bundle
+
+
+def background_load():
+    started = time.perf_counter()
+    try:
+        bundle = load_or_train()
+    except Exception as exc:
+        state["error"] = f"{type(exc).__name__}: {exc}"
+        print(f"❌ Model loading failed: {state['error']}")
+        return
+
+    apply_bundle(bundle)
+    state["load_seconds"] = round(time.perf_counter() - started, 3)
+    state["ready"] = True
+
+    print(f"✅ Models ready ({state['model_version']}) in {state['load_seconds']}s")
+
+
+def apply_bundle(bundle):
+    state["profit_model"] = bundle["profit_model"]
+    state["sales_model"] = bundle["sales_model"]
+    state["shards"] = bundle.get("shards")
+    state["backend"] = bundle.get("backend", "random_forest")
+    state["model_version"] = bundle["model_version"]
+    state["training"] = bundle.get("training")
+
+
+@app.on_event("startup")
+def start_background_load():
+    if SHARD_URLS:
+        # Router mode holds no models, the shards report their own readiness
+        state["backend"] = "router"
+        state["ready"] = True
+        return
+
+    check_model_path()
+    check_training_defaults()
+
+    # Bind immediately; the models are loaded/trained off the event loop
+    threading.Thread(target=background_load, name="model-loader", daemon=True).start()
+
+
+def require_ready():
+    if not state["ready"]:
+        detail = state["error"] or "Model is still loading"
+        raise HTTPException(status_code=503, detail=detail, headers={"Retry-After": "5"})
+
+
+def call_shard(category, path, payload):
+    if category not in SHARD_URLS:
+        raise HTTPException(status_code=404, detail=f"No shard configured for category {category!r}")
+
+    request = urllib.request.Request(
+        SHARD_URLS[category].rstrip("/") + path,
+        data=json.dumps(payload).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=10) as resp:
+            return json.loads(resp.read())
+    except urllib.error.HTTPError as exc:
+        raise HTTPException(status_code=exc.code, detail=f"Shard {category}: {exc.read().decode(errors='replace')}")
+    except urllib.error.URLError as exc:
+        raise HTTPException(status_code=502, detail=f"Shard {category} unreachable: {exc.reason}")
 
-print("✅ Models trained and API is ready!")
 
 # -----------------------------
 # Request schema
@@ -63,17 +403,65 @@ class PredictRequest(BaseModel):
     competitor_price: float
 
 
+class RetrainRequest(BaseModel):
+    # Only retrain this category's shard (all models when omitted)
+    category: Optional[str] = None
+    # Training window, falls back to TRAINING_DEFAULTS when omitted
+    last_n_days: Optional[int] = Field(None, gt=0)
+    as_of: Optional[datetime] = None
+    recency_half_life_days: Optional[float] = Field(None, gt=0)
+    sample_size: Optional[int] = Field(None, gt=0)
+
+
 @app.get("/")
 def home():
-    return {"message": "Discount Optimization API (V3) is running 🚀"}
+    status = "ready" if state["ready"] else ("failed" if state["error"] else "loading")
+    return {"message": "Discount Optimization API (V3) is running 🚀", "status": status}
+
+
+@app.get("/healthz")
+def healthz():
+    # Liveness: the process is up and the model load has not failed for good.
+    # A failed load never recovers on its own, so let the orchestrator restart us.
+    if state["error"]:
+        raise HTTPException(status_code=500, detail=f"Model loading failed: {state['error']}")
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+def readyz():
+    # Readiness: the models are loaded and predictions can be served
+    require_ready()
+    return {
+        "status": "ready",
+        "backend": state["backend"],
+        "model_version": state["model_version"],
+        "load_seconds": state["load_seconds"],
+        "shards": sorted(state["shards"]) if state["shards"] else ([SHARD_CATEGORY] if SHARD_CATEGORY else None),
+        "training": state["training"],
+        "last_retrain": state["last_retrain"],
+    }
 
 
 @app.post("/predict")
 def predict(req: PredictRequest):
+    if SHARD_URLS:
+        return call_shard(req.category, "/predict", req.dict())
+
+    require_ready()
+
+    if SHARD_CATEGORY and req.category != SHARD_CATEGORY:
+        raise HTTPException(status_code=404, detail=f"This shard only serves category {SHARD_CATEGORY!r}")
+
+    import pandas as pd
+
     input_df = pd.DataFrame([req.dict()])
 
-    pred_profit = float(profit_model.predict(input_df)[0])
-    pred_units = float(sales_model.predict(input_df)[0])
+    try:
+        pred_profit = float(state["profit_model"].predict(input_df)[0])
+        pred_units = float(state["sales_model"].predict(input_df)[0])
+    except UnknownShardError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
 
     # -----------------------------
     # Price Alert Logic (Business Insight)
@@ -81,11 +469,11 @@ def predict(req: PredictRequest):
     our_price = req.base_price * (1 - req.discount_pct / 100)
 
     if our_price > req.competitor_price:
-        price_alert = "⚠️ Our price is higher than competitor → possible demand drop"
+        price_alert = ALERT_HIGHER
     elif our_price < req.competitor_price:
-        price_alert = "✅ Our price is cheaper than competitor → competitive advantage"
+        price_alert = ALERT_CHEAPER
     else:
-        price_alert = "ℹ️ Our price equals competitor"
+        price_alert = ALERT_EQUAL
 
     return {
         "predicted_profit": round(pred_profit, 2),
@@ -93,3 +481,130 @@ def predict(req: PredictRequest):
         "our_price": round(our_price, 2),
         "price_alert": price_alert
     }
+
+
+# -----------------------------
+# Retraining
+# -----------------------------
+retrain_lock = threading.Lock()
+
+
+def finish_retrain(category, started, error=None):
+    state["last_retrain"] = {
+        "status": "failed" if error else "ok",
+        "category": category,
+        "error": error,
+        "seconds": round(time.perf_counter() - started, 3),
+        "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def retrain(category=None, options=None):
+    with retrain_lock:
+        started = time.perf_counter()
+        try:
+            if category and state["shards"] is not None:
+                # Refit one shard in place; the other categories keep serving unchanged
+                df = read_history(category, options)
+                state["shards"][category] = fit_models(df, state["backend"])
+                state["model_version"] = new_model_version(state["backend"])
+                state["training"] = {**training_options(options), "rows": len(df), "category": category}
+            elif SHARD_BY_CATEGORY:
+                apply_bundle(train_sharded_models(state["backend"], options))
+            else:
+                apply_bundle(train_models(state["backend"], options=options))
+        except Exception as exc:
+            finish_retrain(category, started, f"{type(exc).__name__}: {exc}")
+            print(f"❌ Retraining failed: {state['last_retrain']['error']}")
+            return
+
+        finish_retrain(category, started)
+        if MODEL_PATH:
+            bundle_keys = ["profit_model", "sales_model", "shards", "backend", "model_version", "training"]
+            save_bundle_or_warn({k: state[k] for k in bundle_keys if state[k] is not None})
+
+    print(f"✅ Retrained {category or 'all categories'} ({state['model_version']}) in {time.perf_counter() - started:.1f}s")
+
+
+@app.post("/retrain", status_code=202)
+def retrain_endpoint(req: RetrainRequest, background_tasks: BackgroundTasks):
+    if SHARD_URLS:
+        if not req.category:
+            raise HTTPException(status_code=422, detail="Router mode retrains one category shard at a time")
+        return call_shard(req.category, "/retrain", json.loads(req.json()))
+
+    require_ready()
+
+    # A category can only be retrained by a process that holds that category's shard
+    if req.category and state["shards"] is None and req.category != SHARD_CATEGORY:
+        detail = (
+            f"This shard only serves category {SHARD_CATEGORY!r}" if SHARD_CATEGORY
+            else "This process has no category shards, retrain without a category"
+        )
+        raise HTTPException(status_code=404, detail=detail)
+
+    options = {k: getattr(req, k) for k in TRAINING_DEFAULTS if getattr(req, k) is not None}
+    if "as_of" in options:
+        # Keep options JSON-friendly: they end up in /readyz and the saved bundle
+        options["as_of"] = options["as_of"].isoformat()
+    background_tasks.add_task(retrain, req.category, options)
+    return {"status": "retrain scheduled", "category": req.category, "training": training_options(options)}
+
+
+# -----------------------------
+# Price elasticity lookups (served from the precomputed table, no model calls)
+# -----------------------------
+elasticity_cache = {"mtime": None, "table": {}}
+
+
+def elasticity_table():
+    if not os.path.exists(ELASTICITY_PATH):
+        raise HTTPException(status_code=503, detail="Elasticity table not built yet, run elasticity.py")
+
+    # Reload only when elasticity.py has rewritten the file
+    mtime = os.path.getmtime(ELASTICITY_PATH)
+    if elasticity_cache["mtime"] != mtime:
+        with open(ELASTICITY_PATH, newline="") as f:
+            elasticity_cache["table"] = {
+                (row["product"], row["region"]): {
+                    "product": row["product"],
+                    "region": row["region"],
+                    "n": int(float(row["n"])),
+                    "price_elasticity": round(float(row["price_elasticity"]), 4),
+                    "competitor_price_elasticity": round(float(row["competitor_price_elasticity"]), 4),
+                    "r2": round(float(row["r2"]), 4),
+                }
+                for row in csv.DictReader(f)
+            }
+        elasticity_cache["mtime"] = mtime
+    return elasticity_cache["table"]
+
+
+@app.get("/elasticity")
+def elasticity(product: str = None, region: str = None):
+    rows = [
+        row for row in elasticity_table().values()
+        if (product is None or row["product"] == product) and (region is None or row["region"] == region)
+    ]
+    if not rows:
+        raise HTTPException(status_code=404, detail="No elasticity estimate for this product/region")
+    return {"elasticities": rows}
+
+
+elasticity_lock = threading.Lock()
+
+
+def refresh_elasticity():
+    import elasticity as elasticity_job
+
+    # One refresh at a time: concurrent runs would share the same .tmp files
+    with elasticity_lock:
+        _, new_rows = elasticity_job.update(DATA_PATH, ELASTICITY_PATH)
+    print(f"✅ Elasticity table refreshed with {new_rows:,} new rows")
+
+
+@app.post("/elasticity/refresh", status_code=202)
+def elasticity_refresh(background_tasks: BackgroundTasks):
+    # Folds rows appended to the history since the last build into the table
+    background_tasks.add_task(refresh_elasticity)
+    return {"status": "refresh scheduled"}
@@ -0,0 +1,175 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+# -----------------------------
+# Price elasticity tables
+# Per product x region log-log fit:
+#   log(units_sold) = a + b * log(our_price) + c * log(competitor_price)
+# b = own price elasticity (% units per 1% change in our price, competitor price fixed;
+#     a 1% discount moves units by about -b %)
+# c = competitor price elasticity (% units per 1% change in the competitor's price)
+#
+# Each group keeps the sufficient statistics of its least-squares fit, so new
+# rows are folded in by adding sums instead of refitting the full history.
+# -----------------------------
+DATA_PATH = "sales_history.csv"
+TABLE_PATH = "elasticity_table.csv"
+
+KEYS = ["product", "region"]
+STAT_COLS = ["n", "s_p", "s_c", "s_y", "s_pp", "s_pc", "s_cc", "s_py", "s_cy", "s_yy"]
+FIT_COLS = ["intercept", "price_elasticity", "competitor_price_elasticity", "r2"]
+# Bumped whenever the regressors change, so old tables are rebuilt instead of extended
+TABLE_FORMAT = 2
+USECOLS = ["product", "region", "base_price", "discount_pct", "competitor_price", "units_sold"]
+
+
+def meta_path(table_path):
+    return os.path.splitext(table_path)[0] + ".meta.json"
+
+
+def head_fingerprint(data_path, n_bytes=1 << 16):
+    # Changes when the file is rewritten rather than appended to
+    with open(data_path, "rb") as f:
+        return hashlib.sha256(f.read(n_bytes)).hexdigest()
+
+
+def group_stats(df):
+    our_price = df["base_price"].to_numpy(float) * (1 - df["discount_pct"].to_numpy(float) / 100)
+    p = np.log(our_price)
+    c = np.log(df["competitor_price"].to_numpy(float))
+    y = np.log(np.maximum(df["units_sold"].to_numpy(float), 1))
+
+    terms = pd.DataFrame({
+        "product": df["product"].to_numpy(),
+        "region": df["region"].to_numpy(),
+        "n": 1,
+        "s_p": p, "s_c": c, "s_y": y,
+        "s_pp": p * p, "s_pc": p * c, "s_cc": c * c,
+        "s_py": p * y, "s_cy": c * y, "s_yy": y * y,
+    })
+    return terms.groupby(KEYS, sort=False)[STAT_COLS].sum()
+
+
+def solve(stats):
+    # Normal equations for every group at once: (G, 3, 3) @ (G, 3)
+    s = {c: stats[c].to_numpy(float) for c in STAT_COLS}
+    xtx = np.stack([
+        np.stack([s["n"], s["s_p"], s["s_c"]], axis=-1),
+        np.stack([s["s_p"], s["s_pp"], s["s_pc"]], axis=-1),
+        np.stack([s["s_c"], s["s_pc"], s["s_cc"]], axis=-1),
+    ], axis=1)
+    xty = np.stack([s["s_y"], s["s_py"], s["s_cy"]], axis=-1)
+
+    # pinv keeps groups with a single price point (rank deficient) finite
+    beta = np.einsum("gij,gj->gi", np.linalg.pinv(xtx), xty)
+
+    sse = s["s_yy"] - 2 * np.einsum("gi,gi->g", beta, xty) + np.einsum("gi,gij,gj->g", beta, xtx, beta)
+    sst = s["s_yy"] - s["s_y"] ** 2 / s["n"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r2 = np.where(sst > 0, 1 - sse / sst, 0.0)
+
+    table = stats.copy()
+    table["intercept"] = beta[:, 0]
+    table["price_elasticity"] = beta[:, 1]
+    table["competitor_price_elasticity"] = beta[:, 2]
+    table["r2"] = r2
+    return table
+
+
+def load_table(table_path):
+    if not os.path.exists(table_path) or not os.path.exists(meta_path(table_path)):
+        return None, None
+    with open(meta_path(table_path)) as f:
+        meta = json.load(f)
+    if meta.get("format") != TABLE_FORMAT:
+        return None, None
+    stats = pd.read_csv(table_path, index_col=KEYS)[STAT_COLS]
+    # Every processed row adds 1 to exactly one group's n; a mismatch means the
+    # table and its meta come from different runs (e.g. a crash between the two writes)
+    if int(stats["n"].sum()) != meta["rows_processed"]:
+        return None, None
+    return stats, meta
+
+
+def save_table(table, meta, table_path):
+    tmp_table = table_path + ".tmp"
+    tmp_meta = meta_path(table_path) + ".tmp"
+    table[STAT_COLS + FIT_COLS].reset_index().to_csv(tmp_table, index=False)
+    with open(tmp_meta, "w") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_table, table_path)
+    os.replace(tmp_meta, meta_path(table_path))
+
+
+def update(data_path=DATA_PATH, table_path=TABLE_PATH, full=False, chunk_size=1_000_000):
+    stats, meta = (None, None) if full else load_table(table_path)
+    source = os.path.abspath(data_path)
+    head = head_fingerprint(data_path)
+    if meta is not None and (
+        meta.get("source") != source
+        or meta.get("head_sha256") != head
+        or os.path.getsize(data_path) < meta.get("file_size", 0)
+    ):
+        # Different, rewritten or truncated file: the saved sums no longer apply
+        stats, meta = None, None
+
+    # Rows already folded into the table are skipped by count (no per-row skip set);
+    # only appended rows are parsed
+    done = meta["rows_processed"] if meta else 0
+    columns = list(pd.read_csv(data_path, nrows=0).columns)
+    new_rows = 0
+    try:
+        reader = pd.read_csv(
+            data_path,
+            header=None,
+            names=columns,
+            usecols=USECOLS,
+            skiprows=done + 1,
+            chunksize=chunk_size,
+        )
+        for chunk in reader:
+            chunk_stats = group_stats(chunk)
+            stats = chunk_stats if stats is None else stats.add(chunk_stats, fill_value=0)
+            new_rows += len(chunk)
+    except pd.errors.EmptyDataError:
+        pass
+
+    if stats is None:
+        raise ValueError(f"No rows found in {data_path}")
+
+    table = solve(stats)
+    meta = {
+        "source": source,
+        "format": TABLE_FORMAT,
+        "head_sha256": head,
+        "file_size": os.path.getsize(data_path),
+        "rows_processed": done + new_rows,
+        "updated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    save_table(table, meta, table_path)
+    return table, new_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or incrementally update the price elasticity table")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--table", default=TABLE_PATH)
+    parser.add_argument("--full", action="store_true", help="ignore the saved table and rebuild from scratch")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    table, new_rows = update(args.data, args.table, full=args.full)
+    elapsed = time.perf_counter() - started
+
+    print(f"✅ Folded {new_rows:,} new rows into {len(table)} product x region groups in {elapsed:.2f}s")
+    print(table[["n"] + FIT_COLS].round(3).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import discount_api
+
+# -----------------------------
+# Model evaluation harness
+# k-fold or time-based holdout for the profit_model / sales_model pipelines of
+# every version. Accuracy folds run in a process pool and each fold result is
+# cached under a fingerprint of the data file and the evaluation config, so
+# re-running after a speed change only refits what actually changed.
+# Fit/predict timings are never taken from the pool (folds would compete for
+# cores) nor from the cache (other machines, other pool sizes): they come from
+# a separate serial pass on this machine.
+# -----------------------------
+HERE = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(HERE, ".eval_cache")
+
+TARGETS = {"profit_model": "profit", "sales_model": "units_sold"}
+
+# Mirrors the models trained by each version's discount_api.py
+VERSIONS = {
+    "V1": {
+        "data": os.path.join(HERE, "..", "V1_basic", "sales_history.csv"),
+        "features": ["product", "category", "region", "base_price", "discount_pct"],
+        "n_estimators": 150,
+    },
+    "V2": {
+        "data": os.path.join(HERE, "..", "V2_optimization", "sales_history.csv"),
+        "features": ["product", "category", "region", "base_price", "discount_pct", "competitor_price"],
+        "n_estimators": 250,
+    },
+    "V3": {
+        "data": os.path.join(HERE, "sales_history.csv"),
+        "features": discount_api.FEATURES,
+        "backend": discount_api.MODEL_BACKEND,
+    },
+}
+
+
+def build_pipeline(config):
+    if "backend" in config:
+        return discount_api.BACKENDS[config["backend"]]()
+
+    from sklearn.compose import ColumnTransformer
+    from sklearn.preprocessing import OneHotEncoder
+    from sklearn.pipeline import Pipeline
+    from sklearn.ensemble import RandomForestRegressor
+
+    cat_cols = ["product", "category", "region"]
+    num_cols = [c for c in config["features"] if c not in cat_cols]
+    preprocess = ColumnTransformer(
+        transformers=[
+            ("cat", OneHotEncoder(handle_unknown="ignore"), cat_cols),
+            ("num", "passthrough", num_cols),
+        ]
+    )
+    return Pipeline([
+        ("prep", preprocess),
+        ("model", RandomForestRegressor(n_estimators=config["n_estimators"], random_state=42))
+    ])
+
+
+# -----------------------------
+# Folds
+# -----------------------------
+loaded_data = {}
+
+
+def load_data(path):
+    # Cached per worker process, every fold of a version reuses the same frame
+    if path not in loaded_data:
+        loaded_data[path] = pd.read_csv(path)
+    return loaded_data[path]
+
+
+def make_folds(df, split):
+    if split["method"] == "time":
+        # Expanding window: train on everything before each later slice of dates
+        from sklearn.model_selection import TimeSeriesSplit
+
+        order = np.argsort(pd.to_datetime(df["date"]).to_numpy(), kind="stable")
+        return [(order[train], order[test]) for train, test in TimeSeriesSplit(n_splits=split["folds"]).split(order)]
+
+    from sklearn.model_selection import KFold
+
+    kfold = KFold(n_splits=split["folds"], shuffle=True, random_state=split["seed"])
+    return list(kfold.split(df))
+
+
+def fold_frames(config, split, fold):
+    df = load_data(config["data"])
+    train_idx, test_idx = make_folds(df, split)[fold]
+    train, test = df.iloc[train_idx], df.iloc[test_idx]
+
+    if config.get("last_n_days") or config.get("recency_half_life_days"):
+        # Same training window as discount_api.py, relative to the newest training row
+        from history_index import SalesHistory, training_frame
+
+        train = training_frame(
+            SalesHistory.from_frame(train),
+            last_n_days=config.get("last_n_days"),
+            recency_half_life_days=config.get("recency_half_life_days"),
+        )
+
+    fit_params = {}
+    if "sample_weight" in train:
+        fit_params["model__sample_weight"] = train["sample_weight"].to_numpy()
+    return train, test, fit_params
+
+
+def evaluate_fold(config, split, fold):
+    # Accuracy only; runs in the pool and is safe to cache
+    from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+    train, test, fit_params = fold_frames(config, split, fold)
+
+    result = {"fold": fold, "train_rows": len(train), "test_rows": len(test)}
+    for name, target in TARGETS.items():
+        model = build_pipeline(config)
+        model.fit(train[config["features"]], train[target], **fit_params)
+        pred = model.predict(test[config["features"]])
+
+        result[f"{target}_mae"] = mean_absolute_error(test[target], pred)
+        result[f"{target}_rmse"] = float(np.sqrt(mean_squared_error(test[target], pred)))
+        result[f"{target}_r2"] = r2_score(test[target], pred)
+    return result
+
+
+def time_fold(config, split, fold=0):
+    # Speed only; called serially in the main process once the pool is gone
+    train, test, fit_params = fold_frames(config, split, fold)
+
+    fit_s = predict_s = 0.0
+    for name, target in TARGETS.items():
+        model = build_pipeline(config)
+
+        started = time.perf_counter()
+        model.fit(train[config["features"]], train[target], **fit_params)
+        fit_s += time.perf_counter() - started
+
+        started = time.perf_counter()
+        model.predict(test[config["features"]])
+        predict_s += time.perf_counter() - started
+
+    return {"fit_s": fit_s, "predict_us_per_row": predict_s / len(test) * 1e6}
+
+
+# -----------------------------
+# Cache
+# -----------------------------
+def file_fingerprint(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_key(data_fingerprint, config, split, fold):
+    import sklearn
+
+    payload = {
+        "data": data_fingerprint,
+        "config": {k: v for k, v in config.items() if k != "data"},
+        # Editing a backend's hyperparameters invalidates its cached folds
+        "backend_source": inspect.getsource(discount_api.BACKENDS[config["backend"]]) if "backend" in config else None,
+        "split": split,
+        "fold": fold,
+        "sklearn": sklearn.__version__,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()[:24]
+
+
+def cached_result(key):
+    path = os.path.join(CACHE_DIR, f"{key}.json")
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return None
+
+
+def store_result(key, result):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(os.path.join(CACHE_DIR, f"{key}.json"), "w") as f:
+        json.dump(result, f)
+
+
+# -----------------------------
+# Report
+# -----------------------------
+def run(configs, split, workers=None, use_cache=True, timing=True):
+    fingerprints = {}
+    tasks = []
+    results = []
+    for label, config in configs.items():
+        if config["data"] not in fingerprints:
+            fingerprints[config["data"]] = file_fingerprint(config["data"])
+        for fold in range(split["folds"]):
+            key = cache_key(fingerprints[config["data"]], config, split, fold)
+            hit = cached_result(key) if use_cache else None
+            if hit is not None:
+                results.append({"config": label, "cached": True, **hit})
+            else:
+                tasks.append((label, config, fold, key))
+
+    print(f"🧪 {len(tasks)} folds to run, {len(results)} from cache")
+    if tasks:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [(label, key, pool.submit(evaluate_fold, config, split, fold)) for label, config, fold, key in tasks]
+            for label, key, future in futures:
+                result = future.result()
+                store_result(key, result)
+                results.append({"config": label, "cached": False, **result})
+
+    folds = pd.DataFrame(results).sort_values(["config", "fold"])
+    metrics = [f"{target}_{metric}" for target in TARGETS.values() for metric in ["mae", "rmse", "r2"]]
+    report = folds.groupby("config")[metrics].agg(["mean", "std"])
+
+    if timing:
+        # One uncontended fit/predict per config, fold 0, measured now on this machine
+        print(f"⏱️ Timing {len(configs)} configs serially ...")
+        timings = pd.DataFrame({label: time_fold(config, split) for label, config in configs.items()}).T
+        timings.columns = pd.MultiIndex.from_product([timings.columns, ["serial"]])
+        report = timings.join(report)
+    return folds, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate model speed and accuracy for every version")
+    parser.add_argument("--versions", nargs="+", default=list(VERSIONS), choices=list(VERSIONS))
+    parser.add_argument("--backends", nargs="+", choices=sorted(discount_api.BACKENDS),
+                        help="evaluate V3 with each of these backends")
+    parser.add_argument("--last-n-days", type=int, help="train each fold on its last N days only")
+    parser.add_argument("--recency-half-life-days", type=float, help="recency-weight each fold's training rows")
+    parser.add_argument("--split", choices=["kfold", "time"], default="kfold")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--no-timing", action="store_true", help="skip the serial fit/predict timing pass")
+    parser.add_argument("--out", help="optional CSV path for the per-fold results")
+    args = parser.parse_args()
+
+    configs = {}
+    for version in args.versions:
+        if version == "V3" and args.backends:
+            for backend in args.backends:
+                configs[f"V3:{backend}"] = {**VERSIONS["V3"], "backend": backend}
+        else:
+            configs[version] = VERSIONS[version]
+
+    if args.last_n_days or args.recency_half_life_days:
+        window = {"last_n_days": args.last_n_days, "recency_half_life_days": args.recency_half_life_days}
+        suffix = "".join([
+            f"@{args.last_n_days}d" if args.last_n_days else "",
+            f"~{args.recency_half_life_days:g}d" if args.recency_half_life_days else "",
+        ])
+        configs = {f"{label}{suffix}": {**config, **window} for label, config in configs.items()}
+
+    split = {"method": args.split, "folds": args.folds, "seed": args.seed}
+    folds, report = run(configs, split, workers=args.workers, use_cache=not args.no_cache, timing=not args.no_timing)
+
+    with pd.option_context("display.width", 200, "display.max_columns", None):
+        print(report.round(3).to_string())
+
+    if args.out:
+        folds.to_csv(args.out, index=False)
+        print(f"💾 Fold results saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+# -----------------------------
+# Synthetic sales history generator
+# Reproduces the schema and shape of sales_history.csv at any size.
+# Rows are produced chunk by chunk, so memory stays flat for 1M-100M rows.
+# -----------------------------
+
+# Product Catalog (same as ui.py)
+PRODUCTS = {
+    "Laptop": {"category": "Electronics", "base_price": 50000},
+    "Gaming Laptop": {"category": "Electronics", "base_price": 75000},
+    "Mobile": {"category": "Electronics", "base_price": 20000},
+    "Premium Mobile": {"category": "Electronics", "base_price": 40000},
+    "Tablet": {"category": "Electronics", "base_price": 25000},
+    "Smartwatch": {"category": "Electronics", "base_price": 8000},
+    "Headphones": {"category": "Electronics", "base_price": 3000},
+    "Bluetooth Speaker": {"category": "Electronics", "base_price": 4500},
+
+    "Washing Machine": {"category": "Appliances", "base_price": 30000},
+    "Refrigerator": {"category": "Appliances", "base_price": 45000},
+    "Microwave Oven": {"category": "Appliances", "base_price": 15000},
+    "Air Conditioner": {"category": "Appliances", "base_price": 42000},
+
+    "Power Bank": {"category": "Accessories", "base_price": 2500},
+    "Wireless Mouse": {"category": "Accessories", "base_price": 1200},
+    "Keyboard": {"category": "Accessories", "base_price": 1800},
+
+    "Fitness Band": {"category": "Wearables", "base_price": 3500},
+    "Smart Glasses": {"category": "Wearables", "base_price": 12000},
+}
+
+REGIONS = ["North", "South", "East", "West", "Central"]
+
+DISCOUNTS = [0, 5, 10, 15, 20, 25, 30, 40]
+
+COLUMNS = [
+    "date", "product", "category", "region", "base_price", "discount_pct",
+    "competitor_price", "units_sold", "revenue", "cost", "profit",
+]
+
+# Shape fitted on the bundled sales_history.csv
+START_DATE = np.datetime64("2025-01-19T05:00:56.000", "ms")
+HISTORY_DAYS = 365
+
+# Average units per transaction at 0% discount
+BASE_UNITS = {"Electronics": 3.7, "Appliances": 3.6, "Accessories": 14.0, "Wearables": 7.5}
+# Unit cost as a fraction of base price (uniform range)
+COST_RATIO = {
+    "Electronics": (0.57, 0.87),
+    "Appliances": (0.75, 0.94),
+    "Accessories": (0.48, 0.62),
+    "Wearables": (0.55, 0.78),
+}
+REGION_DEMAND = {"North": 1.02, "South": 1.09, "East": 0.90, "West": 1.04, "Central": 0.95}
+
+DISCOUNT_LIFT = 0.015        # +1.5% units per discount point
+COMPETITOR_ELASTICITY = 0.5  # units ~ (competitor_price / base_price) ** 0.5
+COMPETITOR_RANGE = (0.85, 1.15)
+DEMAND_SHAPE = 8.0           # gamma-Poisson over-dispersion
+
+
+def generate_chunk(rng, n_rows):
+    names = np.array(list(PRODUCTS))
+    categories = np.array([PRODUCTS[p]["category"] for p in names])
+    prices = np.array([PRODUCTS[p]["base_price"] for p in names], dtype=np.int64)
+    regions = np.array(REGIONS)
+
+    product_idx = rng.integers(0, len(names), n_rows)
+    region_idx = rng.integers(0, len(regions), n_rows)
+    category = categories[product_idx]
+    region = regions[region_idx]
+    base_price = prices[product_idx]
+    discount_pct = rng.choice(np.array(DISCOUNTS, dtype=np.int64), n_rows)
+
+    offsets = rng.integers(0, HISTORY_DAYS * 86_400_000, n_rows)
+    date = START_DATE + offsets.astype("timedelta64[ms]")
+
+    competitor_ratio = rng.uniform(*COMPETITOR_RANGE, n_rows)
+    competitor_price = np.round(base_price * competitor_ratio, 2)
+
+    base_units = pd.Series(category).map(BASE_UNITS).to_numpy()
+    region_demand = pd.Series(region).map(REGION_DEMAND).to_numpy()
+    mean_units = (
+        base_units
+        * region_demand
+        * (1 + DISCOUNT_LIFT * discount_pct)
+        * competitor_ratio ** COMPETITOR_ELASTICITY
+    )
+    mean_units = rng.gamma(DEMAND_SHAPE, mean_units / DEMAND_SHAPE)
+    units_sold = np.maximum(rng.poisson(mean_units), 1)
+
+    cost_low = pd.Series(category).map({c: r[0] for c, r in COST_RATIO.items()}).to_numpy()
+    cost_high = pd.Series(category).map({c: r[1] for c, r in COST_RATIO.items()}).to_numpy()
+    cost_ratio = rng.uniform(cost_low, cost_high)
+
+    revenue = np.round(base_price * (1 - discount_pct / 100) * units_sold, 2)
+    cost = np.round(base_price * cost_ratio * units_sold, 2)
+    profit = np.round(revenue - cost, 2)
+
+    return pd.DataFrame({
+        "date": date,
+        "product": names[product_idx],
+        "category": category,
+        "region": region,
+        "base_price": base_price,
+        "discount_pct": discount_pct,
+        "competitor_price": competitor_price,
+        "units_sold": units_sold,
+        "revenue": revenue,
+        "cost": cost,
+        "profit": profit,
+    }, columns=COLUMNS)
+
+
+def iter_chunks(n_rows, seed=42, chunk_size=500_000):
+    # Each chunk gets its own stream derived from (seed, chunk index),
+    # so the same seed and chunk size always give the same file.
+    for chunk_idx, start in enumerate(range(0, n_rows, chunk_size)):
+        rng = np.random.default_rng([seed, chunk_idx])
+        yield generate_chunk(rng, min(chunk_size, n_rows - start))
+
+
+def write_csv(chunks, path):
+    with open(path, "w", newline="") as f:
+        for i, chunk in enumerate(chunks):
+            chunk["date"] = np.char.add(np.datetime_as_string(chunk["date"].to_numpy(), unit="ms"), "Z")
+            chunk.to_csv(f, header=(i == 0), index=False)
+
+
+def write_parquet(chunks, path):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise SystemExit("❌ Parquet output needs pyarrow: pip install pyarrow") from exc
+
+    writer = None
+    try:
+        for chunk in chunks:
+            chunk["date"] = chunk["date"].dt.tz_localize("UTC")
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic sales history of any size")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-size", type=int, default=500_000)
+    parser.add_argument("--out", default="sales_history_synthetic.csv")
+    parser.add_argument("--format", choices=["csv", "parquet"], help="defaults to the --out extension")
+    args = parser.parse_args()
+
+    fmt = args.format or ("parquet" if args.out.endswith(".parquet") else "csv")
+    writer = write_parquet if fmt == "parquet" else write_csv
+
+    started = time.perf_counter()
+    writer(iter_chunks(args.rows, seed=args.seed, chunk_size=args.chunk_size), args.out)
+    elapsed = time.perf_counter() - started
+
+    print(f"✅ Wrote {args.rows:,} rows to {args.out} in {elapsed:.1f}s ({args.rows / elapsed:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
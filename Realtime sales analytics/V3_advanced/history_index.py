@@ -0,0 +1,137 @@
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+# -----------------------------
+# Date-indexed sales history
+# Rows are kept sorted by `date`, so "as of D" and "last N days" windows are
+# two binary searches and a slice instead of a filter over the full frame.
+# Appended rows are read incrementally, so refreshing does not re-read history;
+# a rewritten or truncated file is detected and loaded again from scratch.
+# -----------------------------
+DAY = np.timedelta64(1, "D")
+HEAD_BYTES = 1 << 16
+
+
+def head_fingerprint(path, n_bytes):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read(n_bytes)).hexdigest()
+
+
+def parse_dates(values):
+    # Naive UTC timestamps, comparable with the "2025-09-21T05:00:56.171Z" strings in the CSV
+    return pd.DatetimeIndex(pd.to_datetime(values, utc=True)).tz_convert(None)
+
+
+class SalesHistory:
+    def __init__(self, df, path=None, rows_read=0):
+        self.df = df
+        self.dates = df["date"].to_numpy()
+        self.path = path
+        self.rows_read = rows_read
+        # Set by load(): what the file looked like when it was read
+        self.file_size = 0
+        self.head_len = 0
+        self.head_sha256 = None
+
+    @classmethod
+    def from_frame(cls, df, path=None, rows_read=0):
+        df = df.copy()
+        df["date"] = parse_dates(df["date"])
+        df = df.sort_values("date", kind="stable").reset_index(drop=True)
+        return cls(df, path, rows_read)
+
+    @classmethod
+    def load(cls, path):
+        size = os.path.getsize(path)
+        head_len = min(size, HEAD_BYTES)
+        head = head_fingerprint(path, head_len)
+
+        df = pd.read_csv(path)
+        history = cls.from_frame(df, os.path.abspath(path), len(df))
+        history.file_size, history.head_len, history.head_sha256 = size, head_len, head
+        return history
+
+    def refresh(self):
+        # Fold in rows appended to the CSV since it was last read
+        size = os.path.getsize(self.path)
+        if size < self.file_size or head_fingerprint(self.path, self.head_len) != self.head_sha256:
+            # Rewritten or truncated, not appended to: row offsets no longer apply
+            self.__dict__.update(SalesHistory.load(self.path).__dict__)
+            return len(self.df)
+
+        try:
+            new = pd.read_csv(self.path, skiprows=self.rows_read + 1, header=None, names=list(self.df.columns))
+        except pd.errors.EmptyDataError:
+            return 0
+        if new.empty:
+            return 0
+
+        new["date"] = parse_dates(new["date"])
+        new = new.sort_values("date", kind="stable")
+        df = pd.concat([self.df, new], ignore_index=True)
+        if len(self.df) and new["date"].iloc[0] < self.dates[-1]:
+            # Late rows: re-sort (stable, so existing order is kept for ties)
+            df = df.sort_values("date", kind="stable").reset_index(drop=True)
+
+        self.df = df
+        self.dates = df["date"].to_numpy()
+        self.rows_read += len(new)
+        self.file_size = size
+        return len(new)
+
+    def window_end(self, as_of=None):
+        # `as_of`, or the newest row of the whole history (not of any category slice)
+        if as_of:
+            return np.datetime64(parse_dates([as_of])[0])
+        return self.dates[-1] if len(self.dates) else None
+
+    def window(self, last_n_days=None, as_of=None):
+        end = self.window_end(as_of)
+        hi = len(self.dates) if not as_of else int(np.searchsorted(self.dates, end, side="right"))
+        lo = 0
+        if last_n_days is not None and hi:
+            lo = int(np.searchsorted(self.dates, end - last_n_days * DAY, side="left"))
+        return self.df.iloc[lo:hi]
+
+    @staticmethod
+    def recency_weights(frame, half_life_days, end):
+        # Weight halves every `half_life_days` before `end`, the same anchor as the window
+        age_days = (end - frame["date"].to_numpy()) / DAY
+        return 0.5 ** (age_days / half_life_days)
+
+    @staticmethod
+    def sample(frame, n, weights=None, seed=42):
+        # Weighted sampling without replacement (Efraimidis-Spirakis keys)
+        if n >= len(frame):
+            return frame
+        rng = np.random.default_rng(seed)
+        u = rng.random(len(frame))
+        keys = np.log(u) / (weights if weights is not None else 1.0)
+        picked = np.sort(np.argpartition(-keys, n - 1)[:n])
+        return frame.iloc[picked]
+
+
+def training_frame(history, last_n_days=None, as_of=None, recency_half_life_days=None,
+                   sample_size=None, category=None, seed=42):
+    # Slice by date, then filter/sample; with a half-life but no sample size the
+    # recency weights are returned as a `sample_weight` column for fitting.
+    frame = history.window(last_n_days=last_n_days, as_of=as_of)
+    if category:
+        frame = frame[frame["category"] == category]
+    if frame.empty:
+        # Nothing to weight or sample; the caller reports the empty window
+        return frame
+
+    weights = None
+    if recency_half_life_days:
+        weights = SalesHistory.recency_weights(frame, recency_half_life_days, history.window_end(as_of))
+
+    if sample_size:
+        return SalesHistory.sample(frame, sample_size, weights, seed)
+
+    if weights is not None:
+        frame = frame.assign(sample_weight=weights)
+    return frame
@@ -0,0 +1,127 @@
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import discount_api
+from discount_api import ALERT_CHEAPER, ALERT_EQUAL, ALERT_HIGHER, FEATURES, cat_cols, num_cols
+
+# -----------------------------
+# Bulk offline scoring
+# Streams a scenario file in chunks, scores the chunks across a process pool
+# (models loaded once per worker) and appends the results to a Parquet file.
+# At most `workers * 2` chunks are in flight, so memory stays bounded.
+# -----------------------------
+DEFAULT_MODEL_PATH = discount_api.MODEL_PATH or "models_v3.joblib"
+
+worker_models = {}
+
+
+def init_worker(model_path):
+    bundle = discount_api.load_bundle(model_path)
+    worker_models["profit_model"] = bundle["profit_model"]
+    worker_models["sales_model"] = bundle["sales_model"]
+
+
+def score_chunk(chunk):
+    X = chunk[FEATURES]
+
+    out = chunk.copy()
+    out["predicted_profit"] = np.round(worker_models["profit_model"].predict(X), 2)
+    out["predicted_units_sold"] = np.round(worker_models["sales_model"].predict(X), 2)
+
+    our_price = chunk["base_price"].to_numpy(float) * (1 - chunk["discount_pct"].to_numpy(float) / 100)
+    competitor_price = chunk["competitor_price"].to_numpy(float)
+    out["our_price"] = np.round(our_price, 2)
+    out["price_alert"] = np.select(
+        [our_price > competitor_price, our_price < competitor_price],
+        [ALERT_HIGHER, ALERT_CHEAPER],
+        default=ALERT_EQUAL,
+    )
+    return out
+
+
+def read_chunks(path, chunk_size):
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        # Pin dtypes: per-chunk inference would turn an all-whole-number chunk into int64
+        dtype = {**{c: float for c in num_cols}, **{c: str for c in cat_cols}}
+        yield from pd.read_csv(path, chunksize=chunk_size, dtype=dtype)
+
+
+def ensure_model(model_path):
+    if os.path.exists(model_path):
+        return
+
+    # Same checks as API startup, against the --model path; the bundle trained here is never sharded
+    discount_api.check_model_path(model_path, sharded=False)
+    discount_api.check_training_defaults()
+
+    print(f"🏋️ {model_path} not found, training models once before scoring ...")
+    # One model over every category, whatever SHARD_CATEGORY this process inherited
+    discount_api.save_bundle(discount_api.train_models(category=None), model_path)
+    print(f"💾 Models saved to {model_path}")
+
+
+def score_file(input_path, output_path, model_path, workers, chunk_size):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    ensure_model(model_path)
+
+    writer = None
+    rows = 0
+    started = time.perf_counter()
+
+    def write(result):
+        nonlocal writer, rows
+        table = pa.Table.from_pandas(result, preserve_index=False)
+        if writer is None:
+            writer = pq.ParquetWriter(output_path, table.schema)
+        else:
+            # Extra input columns are still inferred per chunk, keep them on the first chunk's schema
+            table = table.cast(writer.schema)
+        writer.write_table(table)
+        rows += len(result)
+        print(f"  {rows:,} rows scored ({rows / (time.perf_counter() - started):,.0f} rows/s)")
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(model_path,)) as pool:
+            pending = deque()
+            for chunk in read_chunks(input_path, chunk_size):
+                pending.append(pool.submit(score_chunk, chunk))
+                # Write in input order and keep the number of chunks in memory bounded
+                while len(pending) >= workers * 2:
+                    write(pending.popleft().result())
+            while pending:
+                write(pending.popleft().result())
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return rows, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a large scenario file offline")
+    parser.add_argument("input", help="CSV or Parquet file with the /predict input columns")
+    parser.add_argument("--out", default="scenario_predictions.parquet")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH, help="joblib or compact .npz bundle, trained and saved if missing")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    args = parser.parse_args()
+
+    rows, elapsed = score_file(args.input, args.out, args.model, args.workers, args.chunk_size)
+    print(f"✅ Scored {rows:,} scenarios into {args.out} in {elapsed:.1f}s ({rows / max(elapsed, 1e-9):,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()